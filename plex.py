@@ -2,7 +2,7 @@
 plex.py - Core logic for managing Plex channel metadata, EPG data, and playlist generation.
 """
 
-import threading, json, random, string, time
+import threading, json, random, string, time, logging
 import re, requests, csv, os, gzip, pytz, shutil, gc, itertools
 from urllib.parse import urlencode
 from pathlib import Path
@@ -13,6 +13,9 @@ from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from xml.sax.saxutils import escape
 
+# Shares the server's queued stdout logger
+logger = logging.getLogger("p4c")
+
 class Client:
 # ==== Init ====
     def __init__(self):
@@ -94,11 +97,11 @@ class Client:
         #     print(f"[INFO - {self.client_name.upper()}] Return {local_client_name} Cached Token Response")
 
         if error:
-            print(error)
+            logger.error(error)
             return None, None, None, error
 
         if tokenResponse.status_code not in (200, 201):
-            print(f"HTTP: {tokenResponse.status_code}: {tokenResponse.text}")
+            logger.error(f"HTTP: {tokenResponse.status_code}: {tokenResponse.text}")
             return None, None, None, tokenResponse.text
         else:
             resp = tokenResponse.json()
@@ -117,8 +120,9 @@ class Client:
         return geo_list
 
     def token(self, args):
-        import inspect
-        print(f"[DEBUG] token() call depth: {len(inspect.stack())}")
+        if logger.isEnabledFor(logging.DEBUG):
+            import inspect
+            logger.debug("[DEBUG] token() call depth: %s", len(inspect.stack()))
         error= None
         geo_list = self.generate_geo_list(args)
 
@@ -132,7 +136,7 @@ class Client:
         for geo_code in geo_list:
             if geo_code not in local_x_forward.keys():
                 error = f'[ERROR - {self.client_name.upper()}] Geo Code {geo_code} Not Found'
-                print(error)
+                logger.error(error)
                 return None, error
 
             token_headers.update({"X-Forwarded-For": local_x_forward.get(geo_code)})
@@ -146,7 +150,7 @@ class Client:
             access_token = resp.get('authToken', None)
             if not access_token:
                 error = f'[ERROR - {self.client_name.upper()}] No Token located for {geo_code}'
-                print(error)
+                logger.error(error)
                 return None, error
 
             local_tokenResponses.update({geo_code: tokenResponse})
@@ -176,7 +180,7 @@ class Client:
             response = session.get(url, params=local_params, headers=local_headers, timeout=300)
         except requests.ConnectionError as e:
             error = f"[ERROR - {self.client_name.upper()}:call_genre_api] Connection Error. {str(e)}"
-            print(error)
+            logger.error(error)
         finally:
             session.close()
             del session
@@ -184,7 +188,7 @@ class Client:
 
         if error: return None
         if response.status_code != 200:
-            print(f'[ERROR - {self.client_name.upper()}:call_genre_api] {local_client_name} HTTP Failure {response.status_code}')
+            logger.error(f'[ERROR - {self.client_name.upper()}:call_genre_api] {local_client_name} HTTP Failure {response.status_code}')
             return None
 
         resp = response.json()
@@ -212,8 +216,8 @@ class Client:
             response = session.get(plex_tmsid_url, timeout=300)
         except requests.ConnectionError as e:
             error = f"Connection Error. {str(e)}"
-            print(f'[ERROR - {self.client_name.upper()}] {error}')
-            print(f'[ERROR - {self.client_name.upper()}] Unable to access TMSID Data. No changes made.')
+            logger.error(f'[ERROR - {self.client_name.upper()}] {error}')
+            logger.error(f'[ERROR - {self.client_name.upper()}] Unable to access TMSID Data. No changes made.')
             return listing
         finally:
             # print(f'[INFO - {self.client_name.upper()}] Close {local_client_name} Genre API session')
@@ -226,7 +230,7 @@ class Client:
             # Read in the CSV data
             reader = csv.DictReader(response.text.splitlines())
         else:
-            print(f'[ERROR - {self.client_name.upper()}] {response.status_code}: Unable to access TMSID Data. No changes made.')
+            logger.error(f'[ERROR - {self.client_name.upper()}] {response.status_code}: Unable to access TMSID Data. No changes made.')
             return listing
 
         tmsid_dict = {}
@@ -247,7 +251,7 @@ class Client:
 
         filtered_tmsid = {k: v for k, v in tmsid_dict.items() if v.get("tmsid")}
 
-        print(f'[INFO - {self.client_name.upper()}] Updating TMSID for {len(filtered_tmsid)} items')
+        logger.info(f'[INFO - {self.client_name.upper()}] Updating TMSID for {len(filtered_tmsid)} items')
         for elem in listing:
             key = listing.get(elem).get('id')
 
@@ -275,15 +279,15 @@ class Client:
                 region, ip_address = values  # Extract key-value pair
                 parsed_data = {region.strip(): ip_address.strip()}  # Convert to dictionary
         except Exception:
-            print('[ERROR - {self.client_name.upper()}] Invalid format for newregion')
+            logger.error('[ERROR - {self.client_name.upper()}] Invalid format for newregion')
 
         if parsed_data:
             local_x_forward = self.x_forward.copy()
             for geo_code in parsed_data:
                 if geo_code in local_x_forward:
-                    print(f'[WARNING - {self.client_name.upper()}:parse_newregion] Updating geo location data to {parsed_data}')
+                    logger.warning(f'[WARNING - {self.client_name.upper()}:parse_newregion] Updating geo location data to {parsed_data}')
                 else:
-                    print(f'[INFO - {self.client_name.upper()}:parse_newregion] ADDING {parsed_data} to geo location data')
+                    logger.info(f'[INFO - {self.client_name.upper()}:parse_newregion] ADDING {parsed_data} to geo location data')
 
             local_x_forward.update(parsed_data)
             with self.lock:
@@ -313,14 +317,14 @@ class Client:
             # Read and parse JSON file
             device_id = json.loads(file_path.read_text())
         except:
-            print(f"[INFO - {self.client_name.upper()}] {client_name.upper()} Generating Device ID")
+            logger.info(f"[INFO - {self.client_name.upper()}] {client_name.upper()} Generating Device ID")
             characters = string.ascii_lowercase + string.digits
             device_id = ''.join(random.choice(characters) for _ in range(length))
             # Create folder if it doesn't exist
             folder_path.mkdir(parents=True, exist_ok=True)
             file_path.write_text(json.dumps(device_id, indent=4))
         else:
-            print(f"[INFO - {self.client_name.upper()}] {client_name.upper()} Using Existing Device ID")
+            logger.info(f"[INFO - {self.client_name.upper()}] {client_name.upper()} Using Existing Device ID")
 
         params.update({'X-Plex-Client-Identifier': device_id})
 
@@ -344,7 +348,7 @@ class Client:
         if error: return None, error
         if token_keychain is None:
             error = f"[ERROR - {self.client_name.upper()}:generate_channels_by_geo] No TOKEN"
-            print(error)
+            logger.error(error)
             return None, error
 
         genres = {}
@@ -355,7 +359,7 @@ class Client:
                 local_headers.update({"X-Forwarded-For": local_x_forward.get(geo_code)})
             else:
                 error = f'[ERROR - {self.client_name.upper()}] {geo_code.upper()} Missing'
-                print(error)
+                logger.error(error)
                 return None, error
 
             genre_list = self.call_genre_api(local_headers)
@@ -370,12 +374,12 @@ class Client:
             while i < 2:
                 access_token = token_keychain.get(geo_code,{}).get('access_token')
                 if access_token:
-                    print(f'[INFO - {self.client_name.upper()}] Access Token located for {geo_code.upper()}')
+                    logger.info(f'[INFO - {self.client_name.upper()}] Access Token located for {geo_code.upper()}')
                     local_params.update({'X-Plex-Token': access_token})
                     i = end_loop
                     failure = False
                 else:
-                    print(f'[INFO - {self.client_name.upper()}] No Token: Generate Token for {geo_code.upper()}')
+                    logger.info(f'[INFO - {self.client_name.upper()}] No Token: Generate Token for {geo_code.upper()}')
                     token_keychain = self.token({'regions': geo_code})
                     i += 1
             if failure:
@@ -390,7 +394,7 @@ class Client:
             channel_dict = self.update_gracenote_tmsids(channel_dict)
 
             channels_by_geo.update({geo_code: channel_dict})
-            print(f'[INFO - {self.client_name.upper()}] Stations Identified for {geo_code.lower()}: {len(stations)}/{len(channel_dict)}')
+            logger.info(f'[INFO - {self.client_name.upper()}] Stations Identified for {geo_code.lower()}: {len(stations)}/{len(channel_dict)}')
 
         with self.lock:
             # self.channels_by_geo = channels_by_geo
@@ -435,12 +439,12 @@ class Client:
 
             if not self.isTimeExpired(sessionAt, session_expires_in):
                 if all(elem in channels_by_geo for elem in geo_list):
-                    print(f"[INFO - {self.client_name.upper()}:channels] Using Cache for Channel Listing")
+                    logger.info(f"[INFO - {self.client_name.upper()}:channels] Using Cache for Channel Listing")
                     return channels_by_geo, error
             else:
-                print(f"[INFO - {self.client_name.upper()}:channels] Refreshing Channel Listing")
+                logger.info(f"[INFO - {self.client_name.upper()}:channels] Refreshing Channel Listing")
         else:
-            print(f"[INFO - {self.client_name.upper()}:channels] Building Channel Listing")
+            logger.info(f"[INFO - {self.client_name.upper()}:channels] Building Channel Listing")
         channels_by_geo, error = self.generate_channels_by_geo(args, geo_list)
 
         with self.lock:
@@ -463,11 +467,11 @@ class Client:
             gc.collect()
 
         if error:
-            print(f'[ERROR - {self.client_name.upper()}] {error} for {geo_code}/{genre_slug}')
+            logger.error(f'[ERROR - {self.client_name.upper()}] {error} for {geo_code}/{genre_slug}')
             return stations
 
         if response.status_code != 200:
-            print(f'[ERROR - {self.client_name.upper()}] HTTP Failure {response.status_code} for {geo_code}/{genre_slug}: {response.text}')
+            logger.error(f'[ERROR - {self.client_name.upper()}] HTTP Failure {response.status_code} for {geo_code}/{genre_slug}: {response.text}')
             return stations
 
         resp = response.json()
@@ -476,7 +480,7 @@ class Client:
         # print(json.dumps(channels[0], indent=2))
 
         if channels is None:
-            print(f"[INFO - {self.client_name.upper()}] No items found for {geo_code}/{genre}")
+            logger.info(f"[INFO - {self.client_name.upper()}] No items found for {geo_code}/{genre}")
             return stations
 
         for elem in channels:
@@ -496,7 +500,7 @@ class Client:
                 case 1:
                     plex_key = key_values[0]
                 case _:
-                    print(f'{slug} with {len(key_values)}')
+                    logger.debug(f'{slug} with {len(key_values)}')
                     plex_key = key_values[0]
 
             try:
@@ -508,7 +512,7 @@ class Client:
 
             if has_drm:
                 note = f"[INFO - {self.client_name.upper()}] {title} has DRM set. Skipping."
-                print(note)
+                logger.info(note)
             else:
                 resolved_logo = self.resolve_logo_url(id, logo)
                 new_item = {'call_sign': callSign,
@@ -578,7 +582,7 @@ class Client:
         try:
             requests.post(f"{base_url}/register", json=self.proxy_map)
         except Exception as e:
-            print(f"[WARNING - {self.client_name.upper()}] Failed to register stream map: {e}")
+            logger.warning(f"[WARNING - {self.client_name.upper()}] Failed to register stream map: {e}")
 
         return m3u
 
@@ -611,15 +615,15 @@ class Client:
                             i.get('name').lower() or '')
             )
 
-        print(f'[INFO - {self.client_name.upper()}] Full Playlist: {len(listings)}')
+        logger.info(f'[INFO - {self.client_name.upper()}] Full Playlist: {len(listings)}')
 
         gracenote = args.get('gracenote')
         if gracenote == 'include':
             listings = list(filter(lambda d: d.get('tmsid'), listings))
-            print(f'[INFO - {self.client_name.upper()}] Gracenote Playlist: {len(listings)}')
+            logger.info(f'[INFO - {self.client_name.upper()}] Gracenote Playlist: {len(listings)}')
         elif gracenote == 'exclude':
             listings = list(filter(lambda d: d.get('tmsid', None) is None, listings))
-            print(f'[INFO - {self.client_name.upper()}] No Gracenote Playlist: {len(listings)}')
+            logger.info(f'[INFO - {self.client_name.upper()}] No Gracenote Playlist: {len(listings)}')
 
         channel_id_type = args.get('compatibility')
 
@@ -673,13 +677,13 @@ class Client:
             response = session.get(url, params=epg_params, headers=epg_headers, timeout=10)
             response.raise_for_status()
         except requests.ConnectionError as e:
-            print(f"[ERROR - {self.client_name.upper()}]: Connection Error. {str(e)}")
+            logger.error(f"[ERROR - {self.client_name.upper()}]: Connection Error. {str(e)}")
             has_error = True
         except requests.exceptions.HTTPError as e:
-            print(f"[ERROR - {self.client_name.upper()}]: HTTP error occurred: {e}")
+            logger.error(f"[ERROR - {self.client_name.upper()}]: HTTP error occurred: {e}")
             has_error = True
         except requests.exceptions.RequestException as e:
-            print(f"[ERROR - {self.client_name.upper()}]: An error occurred: {e}")
+            logger.error(f"[ERROR - {self.client_name.upper()}]: An error occurred: {e}")
             has_error = True
         finally:
             session.close()
@@ -687,7 +691,7 @@ class Client:
         gc.collect()
 
         if response.status_code != 200:
-            print(f'[ERROR - {self.client_name.upper()}] EPG HTTP Failure {response.status_code}')
+            logger.error(f'[ERROR - {self.client_name.upper()}] EPG HTTP Failure {response.status_code}')
             return None
 
         content_type = response.headers.get("Content-Type", "").lower()
@@ -759,7 +763,7 @@ class Client:
             shutil.rmtree(input_folder)
 
         elapsed_time = time.time() - start_time
-        print(f"[NOTIFICATION - {self.client_name.upper()}] {date} MediaContainer XML completed: Elapsed time: {elapsed_time:.2f} seconds.")
+        logger.info(f"[NOTIFICATION - {self.client_name.upper()}] {date} MediaContainer XML completed: Elapsed time: {elapsed_time:.2f} seconds.")
         return output_file
 
     def generate_media_file(self, date, epg_channels):
@@ -775,14 +779,14 @@ class Client:
                     future.result()
                     stations_completed += 1
                 except Exception as e:
-                    print(f"Error processing station: {e}")
+                    logger.error(f"Error processing station: {e}")
 
         futures.clear()
 
         del futures
         gc.collect()
         elapsed_time = time.time() - start_time
-        print(f'[NOTIFICATION - {self.client_name.upper()}] {date} Station API Calls completed - Count {stations_completed}: Elapsed time: {elapsed_time:.2f} seconds.')
+        logger.info(f'[NOTIFICATION - {self.client_name.upper()}] {date} Station API Calls completed - Count {stations_completed}: Elapsed time: {elapsed_time:.2f} seconds.')
 
         date_media_file = self.merge_media_files(date)
         self.generate_epg_from_media_file(date, date_media_file, epg_channels)
@@ -790,12 +794,12 @@ class Client:
         return
 
     def epg(self, args=None):
-        print(f"[DEBUG - {self.client_name.upper()}] Running EPG Call")
+        logger.debug(f"[DEBUG - {self.client_name.upper()}] Running EPG Call")
         channels_by_geo, error = self.channels(args)
         epg_channels = self.generate_epg_station_list(channels_by_geo)
 
         if epg_channels:
-            print(f"[DEBUG - {self.client_name.upper()}] Number of channels {len(epg_channels)}")
+            logger.debug(f"[DEBUG - {self.client_name.upper()}] Number of channels {len(epg_channels)}")
         desired_timezone = pytz.timezone('UTC')
         today = datetime.now(desired_timezone)
 
@@ -813,20 +817,20 @@ class Client:
             filepath = Path(f'{self.data_path}/{filename}')
             try:
                 filepath.unlink()
-                print(f"[NOTIFICATION - {self.client_name.upper()}] {filename} deleted.")
+                logger.info(f"[NOTIFICATION - {self.client_name.upper()}] {filename} deleted.")
             except FileNotFoundError:
                 pass
             except PermissionError:
-                print(f"[ERROR - {self.client_name.upper()}] Permission denied: Unable to delete {filename}")
+                logger.error(f"[ERROR - {self.client_name.upper()}] Permission denied: Unable to delete {filename}")
             return
 
         delete_file(yesterday_epg_file)
         delete_file(yesterday_media_file)
 
-        print(f"[DEBUG - {self.client_name.upper()}] EPG Pass {update_today_epg}")
+        logger.debug(f"[DEBUG - {self.client_name.upper()}] EPG Pass {update_today_epg}")
         break_for_today = False
         if update_today_epg == 0:
-            print(f"[INFO - {self.client_name.upper()}] Update Today's EPG data")
+            logger.info(f"[INFO - {self.client_name.upper()}] Update Today's EPG data")
             self.generate_media_file(today_date, epg_channels)
             break_for_today = True
 
@@ -843,12 +847,12 @@ class Client:
             date_epg_file = f'{loop_date}_epg.xml'
             date_epg_file_path = Path(f'{self.data_path}/{date_epg_file}')
             if date_epg_file_path.exists():
-                print(f'[NOTIFICATION - {self.client_name.upper()}] Using Saved Data for {loop_date}')
+                logger.info(f'[NOTIFICATION - {self.client_name.upper()}] Using Saved Data for {loop_date}')
                 merge_dates.append(date_epg_file)
             else:
                 # Generate EPG File for loop_date
                 if not break_for_today:
-                    print(f'[NOTIFICATION - {self.client_name.upper()}] Collect data for {loop_date}')
+                    logger.info(f'[NOTIFICATION - {self.client_name.upper()}] Collect data for {loop_date}')
                     self.generate_media_file(loop_date, epg_channels)
                     merge_dates.append(date_epg_file)
                 # Loop Date EPG to List
@@ -858,7 +862,7 @@ class Client:
         merge_dates = list(set(merge_dates))
         self.generate_main_epg(merge_dates)
 
-        print(f"[DEBUG - {self.client_name.upper()}] EPG Call Complete")
+        logger.debug(f"[DEBUG - {self.client_name.upper()}] EPG Call Complete")
         return
 
     def generate_main_epg(self, file_list):
@@ -909,21 +913,23 @@ class Client:
 
             # Close the root element in the output file
             f_out.write(b'</tv>')
-        print(f"[DEBUG - {self.client_name.upper()}] Stations Processed Through {ch_file}...")
-        print(f"[DEBUG - {self.client_name.upper()}] Programs Processed Through {p_file}...")
-        print(f"[DEBUG - {self.client_name.upper()}] Number Stations identified: {num_of_channels}")
-        print(f"[DEBUG - {self.client_name.upper()}] Number Programs identified: {num_media_items}")
+        logger.debug(f"[DEBUG - {self.client_name.upper()}] Stations Processed Through {ch_file}...")
+        logger.debug(f"[DEBUG - {self.client_name.upper()}] Programs Processed Through {p_file}...")
+        logger.debug(f"[DEBUG - {self.client_name.upper()}] Number Stations identified: {num_of_channels}")
+        logger.debug(f"[DEBUG - {self.client_name.upper()}] Number Programs identified: {num_media_items}")
         elapsed_time = time.time() - start_time
-        print(f'[DEBUG - {self.client_name.upper()}] EPG FIle Created Elapsed time: {elapsed_time:.2f} seconds.')
+        logger.debug(f'[DEBUG - {self.client_name.upper()}] EPG FIle Created Elapsed time: {elapsed_time:.2f} seconds.')
 
         start_time = time.time()
         # **GZIP Compression Step**
         gzip_file = main_epg + ".gz"
-        with open(main_epg, "rb") as f_in, gzip.open(gzip_file, "wb") as f_out:
+        # Compress to a temporary file so a partially written .gz is never served
+        with open(main_epg, "rb") as f_in, gzip.open(gzip_file + ".tmp", "wb") as f_out:
             shutil.copyfileobj(f_in, f_out)
+        os.replace(gzip_file + ".tmp", gzip_file)
 
         elapsed_time = time.time() - start_time
-        print(f'[DEBUG - {self.client_name.upper()}] Compressed EPG FIle Created Elapsed time: {elapsed_time:.2f} seconds.')
+        logger.debug(f'[DEBUG - {self.client_name.upper()}] Compressed EPG FIle Created Elapsed time: {elapsed_time:.2f} seconds.')
         return
 
     def rebuild_epg(self):
@@ -936,9 +942,9 @@ class Client:
                     try:
                         file.unlink()
                     except:
-                        print(f"[ERROR - {self.client_name.upper()}] Unable to delete {file}")
+                        logger.error(f"[ERROR - {self.client_name.upper()}] Unable to delete {file}")
                     else:
-                        print(f"[ERROR - {self.client_name.upper()}] {file} Deleted")
+                        logger.error(f"[ERROR - {self.client_name.upper()}] {file} Deleted")
 
     def generate_epg_from_media_file(self, date, date_media_file, epg_channels):
         start_time = time.time()
@@ -1013,7 +1019,7 @@ class Client:
             epg_file.write(b"</tv>\n")
 
         elapsed_time = time.time() - start_time
-        print(f"[DEBUG - {self.client_name.upper()}] Generate EPG completed: Elapsed time: {elapsed_time:.2f} seconds.")
+        logger.debug(f"[DEBUG - {self.client_name.upper()}] Generate EPG completed: Elapsed time: {elapsed_time:.2f} seconds.")
 
     def process_video(self, video, station, epg_file):
         originally_available_at = video.attrib.get("originallyAvailableAt", "")
@@ -1076,9 +1082,9 @@ class Client:
                     geo_codes = list(self.x_forward.keys())
                     for geo in geo_codes:
                         self.token({'regions': geo})
-                    print(f"[INFO - {self.client_name.upper()}] Background token refresh complete")
+                    logger.info(f"[INFO - {self.client_name.upper()}] Background token refresh complete")
                 except Exception as e:
-                    print(f"[WARNING - {self.client_name.upper()}] Token refresh failed: {e}")
+                    logger.warning(f"[WARNING - {self.client_name.upper()}] Token refresh failed: {e}")
 
         t = threading.Thread(target=refresh_loop, daemon=True)
         t.start()
@@ -11,17 +11,33 @@ This module provides a Flask web server and scheduling system for:
 from gevent import monkey
 monkey.patch_all()
 
-from gevent.pywsgi import WSGIServer
+import gevent
+
+from gevent.pywsgi import WSGIServer, WSGIHandler
+from gevent.pool import Pool
+from gevent.lock import RLock
 from flask import Flask, redirect, request, Response, send_file, abort
 import os
 import importlib
-import schedule
 import time
 import urllib.parse
 import requests
+import orjson
 import io
-from threading import Thread, Event, Lock
+import sys
+import socket
+import queue
+import logging
+import hashlib
+import shutil
+import tempfile
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from werkzeug.security import safe_join
+from threading import Thread, Event
 from urllib.parse import urljoin
+from logging.handlers import QueueHandler
+from collections import OrderedDict
 
 # Application version information
 VERSION = "5.0.0"
@@ -33,15 +49,155 @@ try:
 except (ValueError, TypeError):
     PORT = 7777
 
+# Configure logging level from environment or use default
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+if not isinstance(logging.getLevelName(LOG_LEVEL), int):
+    LOG_LEVEL = "INFO"
+
+# Log records are queued and written to stdout in batches by a background writer
+logger = logging.getLogger("p4c")
+logger.setLevel(LOG_LEVEL)
+logger.propagate = False
+log_queue = queue.Queue()
+logger.addHandler(QueueHandler(log_queue))
+
+def flush_log_queue(block=False):
+    """
+    Drain all queued log records and write them to stdout with a single write and flush.
+    When block is set, waits for at least one record first.
+    """
+    records = [log_queue.get()] if block else []
+    while True:
+        try:
+            records.append(log_queue.get_nowait())
+        except queue.Empty:
+            break
+    if records:
+        sys.stdout.write(''.join(f"{record.getMessage()}\n" for record in records))
+        sys.stdout.flush()
+
+def log_writer():
+    """
+    Write queued log records to stdout until the process exits.
+    """
+    while True:
+        flush_log_queue(block=True)
+
+Thread(target=log_writer, daemon=True).start()
+
+# Connection handling limits for the WSGI server
+MAX_CONNECTIONS = 10000
+SOCKET_SNDBUF_SIZE = 512 * 1024
+
 # Initialize Flask application
 app = Flask(__name__)
 
 # === In-memory state for proxy functionality ===
-stream_map = {}
-logo_cache = {}
+
+class ShardedMap:
+    """
+    Dictionary split across independently locked shards.
+    Writes for one slug only contend with writes that hash to the same shard.
+    Reads take no lock: a single dict lookup is atomic and cannot yield to the gevent hub.
+    """
+
+    def __init__(self, shard_count=32):
+        self._shards = [({}, RLock()) for _ in range(shard_count)]
+        self.revision = 0  # Bumped whenever an entry is added or changed so readers can cache derived views
+
+    def _shard(self, key):
+        return self._shards[hash(key) % len(self._shards)]
+
+    def get(self, key, default=None):
+        data, _ = self._shard(key)
+        return data.get(key, default)
+
+    def __setitem__(self, key, value):
+        self.update({key: value})
+
+    def update(self, mapping):
+        """
+        Merge mapping into the map. Returns True if any entry was added or changed.
+        """
+        # Group entries by shard so each shard lock is taken only once
+        grouped = {}
+        for key, value in mapping.items():
+            grouped.setdefault(hash(key) % len(self._shards), {})[key] = value
+
+        changed = False
+        for shard_index, entries in grouped.items():
+            data, lock = self._shards[shard_index]
+            with lock:
+                for key, value in entries.items():
+                    if key not in data or data[key] != value:
+                        data[key] = value
+                        changed = True
+
+        # Re-registering an identical map leaves the revision untouched
+        if changed:
+            self.revision += 1
+        return changed
+
+    def keys(self):
+        keys = []
+        for data, _ in self._shards:
+            keys.extend(list(data))
+        return keys
+
+    def __len__(self):
+        return sum(len(data) for data, _ in self._shards)
+
+stream_map = ShardedMap()
+logo_cache = OrderedDict()  # {channel_id: (png bytes, etag, file mtime)}, least recently used first
+logo_cache_bytes = 0
+LOGO_CACHE_MAX_BYTES = 500 * 1024 * 1024
 logo_dir = "./logos"
-segment_base_map = {}  # Stores base URLs for HLS streams
-map_lock = Lock()
+_logo_token = {'keychain': None, 'value': None}  # Token selected from the last seen keychain
+_placeholder_font = None  # Loaded on first placeholder render
+
+# Pooled keep-alive session for upstream logo fetches
+LOGO_SESSION = requests.Session()
+LOGO_SESSION.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=64, max_retries=Retry(total=1)))
+
+# Static request headers for upstream logo fetches
+_LOGO_STATIC_HEADERS = {
+    'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Connection': 'keep-alive',
+    'Origin': 'https://app.plex.tv',
+    'Referer': 'https://app.plex.tv/',
+    'Sec-Fetch-Dest': 'image',
+    'Sec-Fetch-Mode': 'cors',
+    'Sec-Fetch-Site': 'same-site',
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36',
+    'sec-ch-ua': '"Not A(Brand";v="8", "Chromium";v="132", "Google Chrome";v="132"',
+    'sec-ch-ua-mobile': '?0',
+    'sec-ch-ua-platform': '"macOS"',
+}
+segment_base_map = ShardedMap()  # Stores base URLs for HLS streams
+
+# Pooled keep-alive session for upstream HLS fetches
+SEGMENT_SESSION = requests.Session()
+SEGMENT_SESSION.mount('https://', HTTPAdapter(pool_connections=64, pool_maxsize=256))
+SEGMENT_CHUNK_SIZE = 64 * 1024
+
+# On-disk segment cache, trimmed in the background once it exceeds the size limit
+segment_cache_dir = "./cache"
+try:
+    SEGMENT_CACHE_MAX_BYTES = int(float(os.environ.get("SEGMENT_CACHE_MAX_GB", 2)) * 1024 ** 3)
+except (ValueError, TypeError):
+    SEGMENT_CACHE_MAX_BYTES = 2 * 1024 ** 3
+_segment_locks = {}  # In-flight upstream segment fetches keyed by cache path
+_segment_locks_guard = RLock()
+
+# Rewritten playlist bodies keyed by slug: {slug: (fetched_at, ttl, body)}
+PLAYLIST_CACHE_TTL_LIVE = 2
+PLAYLIST_CACHE_TTL_VOD = 300
+PLAYLIST_CACHE_MAX_BYTES = 4 * 1024 * 1024  # Larger playlists are streamed through uncached
+_playlist_cache = {}
+_playlist_locks = {}
+_playlist_locks_guard = RLock()
+_oversized_playlists = set()  # Slugs whose playlists exceeded PLAYLIST_CACHE_MAX_BYTES
 
 # Configure supported providers
 PROVIDER_LIST = ['plex']
@@ -54,6 +210,13 @@ for provider in PROVIDER_LIST:
 # Store trigger events for EPG generation
 trigger_events = {}
 
+# Rendered /proxy page and the stream_map revision it reflects
+_proxy_index_cache = {'revision': None, 'html': ''}
+
+# Rendered index pages keyed by (host, provider geo codes): {key: (rendered_at, html)}
+INDEX_CACHE_TTL = 60
+_index_cache = {}
+
 # Base HTML template for the index page
 url_main = f'''<!DOCTYPE html>
 <html>
@@ -71,6 +234,10 @@ url_main = f'''<!DOCTYPE html>
         <span class="tag">Last Updated: {UPDATED_DATE}</span>
       </h1>'''
 
+# Pre-encoded page head and tail for the index response
+URL_MAIN_B = url_main.encode('utf-8')
+URL_TAIL_B = b'</section></body></html>'
+
 # === Utility Functions ===
 
 def get_proxy_base_url():
@@ -80,33 +247,120 @@ def get_proxy_base_url():
     """
     return request.host_url.rstrip('/')
 
-def rewrite_hls_playlist(playlist_content, slug, base_url):
+def rewrite_playlist_line(line, slug):
     """
-    Rewrite HLS playlist to point segments to our proxy
+    Rewrite a single HLS playlist line (bytes) to point segments to our proxy
     """
-    lines = playlist_content.split('\n')
-    rewritten = []
-    
-    for line in lines:
-        # Skip comments and empty lines
-        if line.startswith('#') or not line.strip():
-            rewritten.append(line)
-            continue
-            
-        # Rewrite .ts segments
-        if line.endswith('.ts'):
-            # Extract just the segment number (e.g. "123.ts" -> "123")
-            segment_num = line.split('/')[-1].split('.')[0]
-            rewritten.append(f"/segment/{slug}/{segment_num}.ts")
-        # Rewrite variant playlists
-        elif line.endswith('.m3u8'):
-            # Extract the slug from the original URL
-            orig_slug = line.split('/')[-1].split('.')[0]
-            rewritten.append(f"/stream/{orig_slug}")
-        else:
-            rewritten.append(line)
-            
-    return '\n'.join(rewritten)
+    # Skip comments and empty lines
+    if line.startswith(b'#') or not line.strip():
+        return line
+
+    # Rewrite .ts segments
+    if line.endswith(b'.ts'):
+        # Extract just the segment number (e.g. b"123.ts" -> b"123")
+        segment_num = line.rsplit(b'/', 1)[-1].split(b'.', 1)[0]
+        return b'/segment/' + slug + b'/' + segment_num + b'.ts'
+    # Rewrite variant playlists
+    if line.endswith(b'.m3u8'):
+        # Extract the slug from the original URL
+        orig_slug = line.rsplit(b'/', 1)[-1].split(b'.', 1)[0]
+        return b'/stream/' + orig_slug
+
+    return line
+
+def fetch_hls_playlist(slug, url):
+    """
+    Fetch the upstream playlist for a slug and rewrite it.
+    Playlists up to PLAYLIST_CACHE_MAX_BYTES are read completely and cached; returns (body, None, None).
+    Larger playlists return (None, chunks, upstream), where chunks yields the rewritten playlist as it streams in.
+    """
+    slug_bytes = slug.encode('utf-8')
+    upstream = SEGMENT_SESSION.get(url, stream=True, timeout=(3, 10))
+    try:
+        upstream.raise_for_status()
+        lines = upstream.iter_lines(chunk_size=SEGMENT_CHUNK_SIZE)
+        parts = []
+
+        content_length = upstream.headers.get('content-length')
+        if not (content_length and int(content_length) > PLAYLIST_CACHE_MAX_BYTES):
+            size = 0
+            for line in lines:
+                line = rewrite_playlist_line(line, slug_bytes) + b'\n'
+                parts.append(line)
+                size += len(line)
+                if size > PLAYLIST_CACHE_MAX_BYTES:
+                    break
+            else:
+                upstream.close()
+                body = b''.join(parts)
+                # Finished (VOD) playlists never change, live ones roll every target duration
+                ttl = PLAYLIST_CACHE_TTL_VOD if b'#EXT-X-ENDLIST' in body else PLAYLIST_CACHE_TTL_LIVE
+                _playlist_cache[slug] = (time.time(), ttl, body)
+                _oversized_playlists.discard(slug)
+                return body, None, None
+    except Exception:
+        upstream.close()
+        raise
+
+    # Too large to cache: later requests for this slug skip the single-flight lock
+    _oversized_playlists.add(slug)
+    return None, stream_hls_playlist(slug_bytes, upstream, lines, parts), upstream
+
+def stream_hls_playlist(slug, upstream, lines, parts):
+    """
+    Yield the already rewritten parts, then the remaining upstream lines rewritten as they arrive.
+    """
+    try:
+        yield from parts
+        for line in lines:
+            yield rewrite_playlist_line(line, slug) + b'\n'
+    except Exception as e:
+        logger.error(f"[HLS PLAYLIST ERROR] {e}")
+    finally:
+        upstream.close()
+
+def get_playlist_lock(slug):
+    """
+    Return the lock guarding upstream playlist fetches for a slug.
+    """
+    with _playlist_locks_guard:
+        lock = _playlist_locks.get(slug)
+        if lock is None:
+            lock = _playlist_locks[slug] = RLock()
+        return lock
+
+def get_cached_playlist(slug):
+    """
+    Return the cached rewritten playlist for a slug, or None if missing or expired.
+    """
+    cached = _playlist_cache.get(slug)
+    if cached and time.time() - cached[0] < cached[1]:
+        return cached[2]
+    return None
+
+def send_epg_file(file_path, **kwargs):
+    """
+    Serve an EPG XML file, using the provider's pre-compressed .gz copy when the client accepts gzip.
+    """
+    gz_path = f"{file_path}.gz"
+    if request.accept_encodings['gzip'] > 0 and is_current_gzip(file_path, gz_path):
+        # The client decodes the body back to XML, so keep the XML file name
+        kwargs.setdefault('download_name', os.path.basename(file_path))
+        response = send_file(gz_path, conditional=True, **kwargs)
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = send_file(file_path, conditional=True, **kwargs)
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+def is_current_gzip(file_path, gz_path):
+    """
+    Check that gz_path exists and was written after file_path, i.e. it is not left over from a previous build.
+    """
+    try:
+        return os.path.getmtime(gz_path) >= os.path.getmtime(file_path)
+    except OSError:
+        return False
 
 # === EPG Generation Management ===
 
@@ -117,22 +371,22 @@ def trigger_epg_build(provider):
     if provider in trigger_events:
         trigger_events[provider].set()
     else:
-        print(f"[ERROR - {provider}] No scheduler thread found for provider: {provider}")
+        logger.error(f"[ERROR - {provider}] No scheduler thread found for provider: {provider}")
 
 def epg_scheduler(provider):
     """
     Execute EPG generation for a provider with error handling.
     """
-    print(f"[INFO - {provider.upper()}] Running EPG Scheduler for {provider}")
+    logger.info(f"[INFO - {provider.upper()}] Running EPG Scheduler for {provider}")
 
     try:
         error = providers[provider].epg()
         if error:
-            print(f"[ERROR - {provider.upper()}] EPG: {error}")
+            logger.error(f"[ERROR - {provider.upper()}] EPG: {error}")
     except Exception as e:
-        print(f"[ERROR - {provider.upper()}] Exception in EPG Scheduler: {e}")
+        logger.error(f"[ERROR - {provider.upper()}] Exception in EPG Scheduler: {e}")
     
-    print(f"[INFO - {provider.upper()}] EPG Scheduler Complete")
+    logger.info(f"[INFO - {provider.upper()}] EPG Scheduler Complete")
 
 def scheduler_thread(provider):
     """
@@ -144,12 +398,12 @@ def scheduler_thread(provider):
 
     event = trigger_events[provider]
 
-    # Configure schedule based on provider type
+    # Configure schedule interval based on provider type
     match provider.lower():
         case 'plex':
-            schedule.every(10).minutes.do(lambda: epg_scheduler(provider))
+            interval = 10 * 60
         case _:
-            schedule.every(1).hours.do(lambda: epg_scheduler(provider))
+            interval = 60 * 60
 
     # Initial EPG generation on startup
     while True:
@@ -157,48 +411,37 @@ def scheduler_thread(provider):
             epg_scheduler(provider)
             break  # Continue to main loop after successful initial run
         except Exception as e:
-            print(f"[ERROR - {provider.upper()}] Error in initial run, retrying: {e}")
+            logger.error(f"[ERROR - {provider.upper()}] Error in initial run, retrying: {e}")
             time.sleep(10)  # Brief delay before retry
             continue
 
     # Main scheduler loop
     while True:
         try:
-            # Run scheduled tasks
-            schedule.run_pending()
-
-            # Check for manual trigger
-            if event.is_set():
-                print(f"[MANUAL TRIGGER - {provider.upper()}] Running epg_scheduler manually...")
-                epg_scheduler(provider)
-                event.clear()  # Reset event after execution
+            # Sleep until the next scheduled run, waking early on a manual trigger
+            if event.wait(timeout=interval):
+                logger.info(f"[MANUAL TRIGGER - {provider.upper()}] Running epg_scheduler manually...")
+                event.clear()  # Reset event before execution so triggers during the run are kept
 
-            time.sleep(1)
+            epg_scheduler(provider)
             
         except Exception as e:
-            print(f"[ERROR - {provider.upper()}] Error in scheduler thread: {e}")
+            logger.error(f"[ERROR - {provider.upper()}] Error in scheduler thread: {e}")
             break  # Exit this loop to restart EPG generation
 
-def monitor_thread(provider):
+def monitor_scheduler(provider):
     """
-    Monitor and restart the scheduler thread if it fails.
+    Start the scheduler greenlet for a provider and restart it as soon as it exits.
     """
-    def thread_wrapper(provider):
-        print(f"[INFO - {provider.upper()}] Starting Scheduler thread for {provider}")
-        scheduler_thread(provider)
+    def launch():
+        logger.info(f"[INFO - {provider.upper()}] Starting Scheduler thread for {provider}")
+        gevent.spawn(scheduler_thread, provider).link(relaunch)
 
-    thread = Thread(target=thread_wrapper, args=(provider,), daemon=True)
-    thread.start()
+    def relaunch(greenlet):
+        logger.error(f"[ERROR - {provider.upper()}] Scheduler thread stopped. Restarting...")
+        gevent.spawn_later(1, launch)
 
-    # Continuously monitor thread health
-    while True:
-        if not thread.is_alive():
-            print(f"[ERROR - {provider.upper()}] Scheduler thread stopped. Restarting...")
-            thread = Thread(target=thread_wrapper, args=(provider,), daemon=True)
-            thread.start()
-        
-        time.sleep(15 * 60)  # Check every 15 minutes
-        print(f"[INFO - {provider.upper()}] Checking scheduler thread")
+    launch()
 
 # === Proxy Routes ===
 
@@ -207,9 +450,12 @@ def register():
     """
     Accepts POSTed JSON body with {slug: stream_url} entries and merges them into the stream_map.
     """
-    new_map = request.get_json(force=True)
-    with map_lock:
-        stream_map.update(new_map)
+    try:
+        new_map = orjson.loads(request.get_data())
+    except orjson.JSONDecodeError:
+        return abort(400)
+    if stream_map.update(new_map):
+        _index_cache.clear()
     return "OK", 200
 
 @app.route('/stream/<slug>')
@@ -218,16 +464,14 @@ def stream(slug):
     Redirects to the stream URL associated with the given slug.
     Also stores HLS base URL if this is an m3u8 stream.
     """
-    with map_lock:
-        url = stream_map.get(slug)
+    url = stream_map.get(slug)
     if not url:
         return abort(404)
     
     # If this is an HLS stream, store the base URL for segment proxying
     if url.endswith('.m3u8'):
         base_url = url.rsplit('/', 1)[0] + '/'
-        with map_lock:
-            segment_base_map[slug] = base_url
+        segment_base_map[slug] = base_url
     
     return redirect(url, code=302)
 
@@ -236,63 +480,172 @@ def segment_proxy(slug, index):
     """
     Proxy individual .ts segments for HLS streams
     """
-    with map_lock:
-        base_url = segment_base_map.get(slug)
-        if not base_url:
-            return abort(404)
+    base_url = segment_base_map.get(slug)
+    if not base_url:
+        return abort(404)
     
     # Reconstruct the real segment URL
     segment_url = urljoin(base_url, f"{index}.ts")
+
+    # Serve from the local segment cache when this segment was already fetched.
+    # Files are keyed by the upstream URL so a new stream session never reuses old segments.
+    segment_key = hashlib.sha1(segment_url.encode('utf-8')).hexdigest()
+    cache_path = safe_join(segment_cache_dir, slug, f"{segment_key}.ts")
+    if not cache_path:
+        return abort(404)
+
+    if os.path.exists(cache_path):
+        try:
+            os.utime(cache_path)  # Mark as recently used for eviction
+            return send_segment(cache_path)
+        except FileNotFoundError:
+            pass  # Evicted since the check; fetch it again below
     
     try:
-        headers = {}
-        if request.headers.get('Range'):
-            headers['Range'] = request.headers['Range']
-
-        # Stream the segment directly to the client
-        req = requests.get(segment_url, headers=headers, stream=True)
+        # Only one request per segment fetches upstream; the rest wait and serve the cached file
+        req = None
+        with get_segment_lock(cache_path):
+            # Another request may have cached it while this one waited
+            if not os.path.exists(cache_path):
+                req = SEGMENT_SESSION.get(segment_url, stream=True, timeout=(3, 30))
+                if req.status_code == 200:
+                    cache_segment(req, cache_path)
+                    req = None
+            release_segment_lock(cache_path)
+
+        if req is None:
+            return send_segment(cache_path)
+
+        # Pass upstream error responses through uncached; reading the body returns the connection to the pool
         return Response(
-            req.iter_content(chunk_size=1024),
-            content_type=req.headers['content-type'],
-            status=req.status_code,
-            headers={
-                'Accept-Ranges': 'bytes',
-                'Cache-Control': 'public, max-age=86400'  # Cache segments for 24 hours
-            }
+            req.content,
+            content_type=req.headers.get('content-type'),
+            status=req.status_code
         )
     except Exception as e:
-        print(f"[SEGMENT ERROR] {e}")
+        logger.error(f"[SEGMENT ERROR] {e}")
         return abort(502)
 
+def get_segment_lock(cache_path):
+    """
+    Return the lock guarding the upstream fetch of a segment.
+    """
+    with _segment_locks_guard:
+        lock = _segment_locks.get(cache_path)
+        if lock is None:
+            lock = _segment_locks[cache_path] = RLock()
+        return lock
+
+def release_segment_lock(cache_path):
+    """
+    Forget the lock for a fetched segment; requests already waiting on it keep their reference.
+    """
+    with _segment_locks_guard:
+        _segment_locks.pop(cache_path, None)
+
+def send_segment(cache_path):
+    """
+    Serve a cached segment file, letting Flask handle Range and conditional requests.
+    """
+    return send_file(cache_path, mimetype='video/MP2T', conditional=True, max_age=86400)
+
+def cache_segment(req, cache_path):
+    """
+    Write an upstream segment response to the segment cache.
+    The body is written to a temporary file first so readers never see a partial segment.
+    """
+    cache_dir = os.path.dirname(cache_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    req.raw.decode_content = True
+
+    with tempfile.NamedTemporaryFile(dir=cache_dir, suffix='.tmp', delete=False) as f:
+        try:
+            shutil.copyfileobj(req.raw, f, length=SEGMENT_CHUNK_SIZE)
+        except BaseException:
+            f.close()
+            os.remove(f.name)
+            raise
+    os.replace(f.name, cache_path)
+
+def segment_cache_evictor():
+    """
+    Periodically trim the segment cache to SEGMENT_CACHE_MAX_BYTES, removing least recently used segments first.
+    """
+    while True:
+        time.sleep(60)
+        try:
+            entries = []
+            total_size = 0
+            for root, _, files in os.walk(segment_cache_dir):
+                for name in files:
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+                    total_size += stat.st_size
+
+            if total_size <= SEGMENT_CACHE_MAX_BYTES:
+                continue
+
+            entries.sort()
+            for _, size, path in entries:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total_size -= size
+                if total_size <= SEGMENT_CACHE_MAX_BYTES:
+                    break
+        except Exception as e:
+            logger.error(f"[ERROR] Segment cache eviction failed: {e}")
+
 @app.route('/hls/<slug>.m3u8')
 def hls_playlist(slug):
     """
     Proxy and rewrite HLS playlists
     """
-    with map_lock:
-        url = stream_map.get(slug)
-        if not url:
-            return abort(404)
+    url = stream_map.get(slug)
+    if not url:
+        return abort(404)
     
-    try:
-        # Fetch the original playlist
-        response = requests.get(url)
-        response.raise_for_status()
-        
-        # Rewrite the playlist contents
-        base_url = url.rsplit('/', 1)[0] + '/'
-        rewritten = rewrite_hls_playlist(response.text, slug, base_url)
-        
-        return Response(
-            rewritten,
+    headers = {
+        'Cache-Control': 'public, max-age=300'  # Cache for 5 minutes
+    }
+
+    body, chunks, upstream = get_cached_playlist(slug), None, None
+    if body is None:
+        try:
+            if slug in _oversized_playlists:
+                # Too large to cache, so every request streams its own upstream fetch
+                body, chunks, upstream = fetch_hls_playlist(slug, url)
+            else:
+                # Only one request per slug reads upstream; the rest wait and reuse the cached result.
+                # The lock covers the upstream read only, never writes to the client.
+                with get_playlist_lock(slug):
+                    body = get_cached_playlist(slug)
+                    if body is None:
+                        body, chunks, upstream = fetch_hls_playlist(slug, url)
+        except Exception as e:
+            logger.error(f"[HLS PLAYLIST ERROR] {e}")
+            return abort(502)
+
+    if chunks is not None:
+        response = Response(
+            chunks,
             content_type='application/vnd.apple.mpegurl',
-            headers={
-                'Cache-Control': 'public, max-age=300'  # Cache for 5 minutes
-            }
+            headers=headers
         )
-    except Exception as e:
-        print(f"[HLS PLAYLIST ERROR] {e}")
-        return abort(502)
+        # Covers clients that disconnect before the body is iterated
+        response.call_on_close(upstream.close)
+        return response
+
+    return Response(
+        body,
+        content_type='application/vnd.apple.mpegurl',
+        headers=headers
+    )
 
 @app.route('/logo/<channel_id>.png')
 def logo(channel_id):
@@ -303,39 +656,32 @@ def logo(channel_id):
     filepath = os.path.join(logo_dir, f"{channel_id}.png")
     client = providers.get('plex')
 
-    # Serve cached logo if available
+    # Serve logo from memory if available
+    cached = logo_cache.get(channel_id)
+    if cached is not None:
+        logo_cache.move_to_end(channel_id)
+        return send_logo(*cached)
+
+    # Otherwise load a previously downloaded logo from disk
     if os.path.exists(filepath):
-        return send_file(filepath, mimetype="image/png")
+        with open(filepath, "rb") as f:
+            return send_logo(*cache_logo(channel_id, f.read(), os.fstat(f.fileno()).st_mtime))
 
     os.makedirs(logo_dir, exist_ok=True)
 
     # Get a valid token from any region
-    token = next(
-        (data.get("access_token") for data in client.token_keychain.values() if "access_token" in data),
-        None
-    )
+    token = get_logo_token(client)
     if not token:
-        print(f"[WARNING] No token available for logo fetch for {channel_id}")
+        logger.warning(f"[WARNING] No token available for logo fetch for {channel_id}")
         return create_or_serve_placeholder(channel_id)
 
     # Prepare headers from provider config
-    headers = client.headers.copy()
-    headers.update({
-        'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Connection': 'keep-alive',
-        'Origin': 'https://app.plex.tv',
-        'Referer': 'https://app.plex.tv/',
-        'Sec-Fetch-Dest': 'image',
-        'Sec-Fetch-Mode': 'cors',
-        'Sec-Fetch-Site': 'same-site',
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36',
-        'sec-ch-ua': '"Not A(Brand";v="8", "Chromium";v="132", "Google Chrome";v="132"',
-        'sec-ch-ua-mobile': '?0',
-        'sec-ch-ua-platform': '"macOS"',
+    headers = {
+        **client.headers,
+        **_LOGO_STATIC_HEADERS,
         'x-plex-token': token or '',
         'x-plex-client-identifier': client.device_id
-    })
+    }
 
     # Upstream logo URL patterns
     url_patterns = [
@@ -346,38 +692,126 @@ def logo(channel_id):
 
     for url in url_patterns:
         try:
-            print(f"[DEBUG] Trying to fetch logo from {url}")
-            response = requests.get(url, timeout=5, headers=headers, allow_redirects=False)
-
-            # Follow manual redirect if present
-            if response.status_code == 302 and "Location" in response.headers:
-                redirected_url = response.headers["Location"]
-                print(f"[DEBUG] Redirected to: {redirected_url}")
-                try:
-                    response = requests.get(redirected_url, timeout=5, headers=headers)
-                except Exception as e:
-                    print(f"[DEBUG] Error fetching redirected logo: {e}")
-                    continue
+            logger.debug("[DEBUG] Trying to fetch logo from %s", url)
+            # Redirects are followed on the same pooled session
+            response = LOGO_SESSION.get(url, timeout=5, headers=headers)
+            if response.history:
+                logger.debug("[DEBUG] Redirected to: %s", response.url)
 
             if response.status_code == 200 and response.content:
                 # Log if fallback CDN logo was used
                 if "epg/cms/production" in url or "epg/cms/production" in response.url:
-                    print(f"[INFO] Fallback CDN logo used for {channel_id}: {response.url}")
+                    logger.info(f"[INFO] Fallback CDN logo used for {channel_id}: {response.url}")
 
                 with open(filepath, "wb") as f:
                     f.write(response.content)
-                print(f"[INFO] Successfully cached logo for {channel_id}")
-                return send_file(filepath, mimetype="image/png")
+                logger.info(f"[INFO] Successfully cached logo for {channel_id}")
+                return send_logo(*cache_logo(channel_id, response.content, os.path.getmtime(filepath)))
             else:
-                print(f"[DEBUG] Failed to fetch logo from {url}: Status {response.status_code}")
+                logger.debug("[DEBUG] Failed to fetch logo from %s: Status %s", url, response.status_code)
 
         except Exception as e:
-            print(f"[DEBUG] Error fetching logo from {url}: {e}")
+            logger.debug("[DEBUG] Error fetching logo from %s: %s", url, e)
 
     # All attempts failed
-    print(f"[WARNING] All logo fetch attempts failed for {channel_id}. Using placeholder.")
+    logger.warning(f"[WARNING] All logo fetch attempts failed for {channel_id}. Using placeholder.")
     return create_or_serve_placeholder(channel_id)
 
+def cache_logo(channel_id, data, mtime):
+    """
+    Store logo bytes and their file mtime in the in-memory logo cache,
+    evicting least recently used logos past LOGO_CACHE_MAX_BYTES.
+    Returns the cached (data, etag, mtime) entry.
+    """
+    global logo_cache_bytes
+
+    previous = logo_cache.pop(channel_id, None)
+    if previous is not None:
+        logo_cache_bytes -= len(previous[0])
+
+    entry = (data, hashlib.sha1(data).hexdigest(), mtime)
+    logo_cache[channel_id] = entry
+    logo_cache_bytes += len(data)
+
+    while logo_cache_bytes > LOGO_CACHE_MAX_BYTES and len(logo_cache) > 1:
+        _, (evicted, _, _) = logo_cache.popitem(last=False)
+        logo_cache_bytes -= len(evicted)
+    return entry
+
+def send_logo(data, etag, mtime):
+    """
+    Serve logo bytes from memory, answering conditional requests with 304.
+    """
+    response = Response(data, mimetype="image/png", headers={'Cache-Control': 'public, max-age=86400'})
+    response.set_etag(etag)
+    response.last_modified = mtime
+    return response.make_conditional(request)
+
+def warm_logo_cache():
+    """
+    Preload previously downloaded logos from logo_dir into memory.
+    """
+    for name in os.listdir(logo_dir):
+        if not name.endswith(".png") or name.startswith("placeholder"):
+            continue
+        try:
+            with open(os.path.join(logo_dir, name), "rb") as f:
+                cache_logo(name[:-len(".png")], f.read(), os.fstat(f.fileno()).st_mtime)
+        except OSError as e:
+            logger.warning(f"[WARNING] Unable to preload logo {name}: {e}")
+    logger.info(f"[INFO] Preloaded {len(logo_cache)} logos into memory")
+
+def get_logo_token(client):
+    """
+    Return an access token from any region for logo fetches.
+    The keychain is only rescanned when the provider replaces it after a token refresh.
+    """
+    keychain = client.token_keychain
+    if keychain is not _logo_token['keychain']:
+        _logo_token['value'] = next(
+            (data.get("access_token") for data in keychain.values() if "access_token" in data),
+            None
+        )
+        _logo_token['keychain'] = keychain
+    return _logo_token['value']
+
+def get_placeholder_font():
+    """
+    Load the placeholder font once, falling back to PIL's default font.
+    """
+    global _placeholder_font
+    if _placeholder_font is None:
+        from PIL import ImageFont
+
+        try:
+            _placeholder_font = ImageFont.truetype("arial.ttf", 40)
+        except OSError:
+            _placeholder_font = ImageFont.load_default()
+    return _placeholder_font
+
+def render_placeholder(short_id):
+    """
+    Render a placeholder logo showing short_id and return it as PNG bytes.
+    """
+    from PIL import Image, ImageDraw
+
+    width, height = 400, 225
+    img = Image.new('RGB', (width, height), color=(73, 109, 137))
+    draw = ImageDraw.Draw(img)
+    font = get_placeholder_font()
+
+    # Calculate centered position
+    left, top, right, bottom = draw.textbbox((0, 0), short_id, font=font)
+    text_width, text_height = right - left, bottom - top
+    position = ((width - text_width) // 2 - left, (height - text_height) // 2 - top)
+
+    # Add channel ID text
+    draw.text(position, short_id, fill=(255, 255, 255), font=font)
+
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
 def create_or_serve_placeholder(channel_id):
     """Create or serve a placeholder logo image."""
     placeholder_path = os.path.join(logo_dir, f"placeholder_{channel_id[0:8]}.png")
@@ -385,53 +819,42 @@ def create_or_serve_placeholder(channel_id):
     
     # If this specific placeholder already exists, serve it
     if os.path.exists(placeholder_path):
-        return send_file(placeholder_path, mimetype="image/png")
+        return send_file(placeholder_path, mimetype="image/png", conditional=True)
     
     # If the default placeholder exists, serve it
     if os.path.exists(default_placeholder):
-        return send_file(default_placeholder, mimetype="image/png")
+        return send_file(default_placeholder, mimetype="image/png", conditional=True)
     
     # Create a simple placeholder
     try:
-        from PIL import Image, ImageDraw, ImageFont
-        
-        width, height = 400, 225
-        img = Image.new('RGB', (width, height), color=(73, 109, 137))
-        draw = ImageDraw.Draw(img)
-
-        # Add channel ID text
         short_id = channel_id.split('-')[0][:8] if '-' in channel_id else channel_id[:8]
-
-        try:
-            font = ImageFont.truetype("arial.ttf", 40)
-        except:
-            font = ImageFont.load_default()
-
-        # Calculate centered position
-        text_width, text_height = draw.textsize(short_id, font=font)
-        position = ((width - text_width) // 2, (height - text_height) // 2)
-
-        draw.text(position, short_id, fill=(255, 255, 255), font=font)
+        png = render_placeholder(short_id)
 
         # Save as both specific and default placeholders
-        img.save(placeholder_path)
-        img.save(default_placeholder)
-        return send_file(placeholder_path, mimetype="image/png")
+        for path in (placeholder_path, default_placeholder):
+            with open(path, 'wb') as f:
+                f.write(png)
+        return send_file(placeholder_path, mimetype="image/png", conditional=True)
         
     except ImportError:
-        print(f"[WARNING] PIL not available. Creating empty placeholder for {channel_id}")
+        logger.warning(f"[WARNING] PIL not available. Creating empty placeholder for {channel_id}")
         with open(placeholder_path, 'wb') as f:
             f.write(b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89\x00\x00\x00\nIDATx\x9cc\x00\x01\x00\x00\x05\x00\x01\r\n-\xb4\x00\x00\x00\x00IEND\xaeB`\x82')
-        return send_file(placeholder_path, mimetype="image/png")
+        return send_file(placeholder_path, mimetype="image/png", conditional=True)
     except Exception as e:
-        print(f"[ERROR] Failed to create placeholder: {e}")
+        logger.error(f"[ERROR] Failed to create placeholder: {e}")
         return abort(404)
 
 @app.route('/proxy')
 def proxy_index():
     """
     Displays a simple HTML interface listing registered stream routes and fallback endpoints.
+    The page is rebuilt only when the stream map has changed since it was last rendered.
     """
+    revision = stream_map.revision
+    if _proxy_index_cache['revision'] == revision:
+        return _proxy_index_cache['html']
+
     rows = [
         f"<tr><td>{slug}</td><td><a href='/stream/{slug}'>/stream/{slug}</a></td></tr>"
         for slug in stream_map.keys()
@@ -449,6 +872,7 @@ def proxy_index():
     {table}
     </body></html>
     """
+    _proxy_index_cache.update(revision=revision, html=html)
     return html
 
 # === Fallback routes for playlist and EPG (for Jellyfin compatibility) ===
@@ -473,11 +897,9 @@ def default_epg():
     """
     file_path = 'data/plex/epg.xml'
     try:
-        return send_file(
-            file_path, 
-            mimetype='application/xml; charset=utf-8',
-            headers={'Cache-Control': 'public, max-age=3600'}  # Cache for 1 hour
-        )
+        response = send_epg_file(file_path, mimetype='application/xml; charset=utf-8')
+        response.headers['Cache-Control'] = 'public, max-age=3600'  # Cache for 1 hour
+        return response
     except FileNotFoundError:
         return "EPG is still being generated. Please try again shortly.", 503
 
@@ -488,7 +910,7 @@ def region_epg(region):
     """
     file_path = f"data/plex/epg-{region}.xml"
     try:
-        return send_file(file_path, mimetype='application/xml; charset=utf-8')
+        return send_epg_file(file_path, mimetype='application/xml; charset=utf-8')
     except FileNotFoundError:
         return "EPG is still being generated. Please try again shortly.", 503
 
@@ -498,9 +920,9 @@ def region_epg(region):
 def register_proxy_map():
     """Register stream URLs with the proxy service."""
     try:
-        data = request.get_json()
-        with map_lock:
-            stream_map.update(data)
+        data = orjson.loads(request.get_data())
+        if stream_map.update(data):
+            _index_cache.clear()
         return "Proxy map updated", 200
     except Exception as e:
         return f"Failed to register proxy map: {e}", 500
@@ -509,18 +931,29 @@ def register_proxy_map():
 def index():
     """Render the main index page with provider options."""
     host = request.host
-    body = ''
-    
-    for provider in providers:
-        geo_code_name = f"{provider.upper()}_CODE"
-        geo_code_list = os.environ.get(geo_code_name)
+    geo_codes = tuple((provider, os.environ.get(f"{provider.upper()}_CODE")) for provider in providers)
+    key = (host, geo_codes)
+    now = time.time()
 
-        body += '<div>'
+    # Serve the recently rendered page for this host and region configuration
+    cached = _index_cache.get(key)
+    if cached and now - cached[0] < INDEX_CACHE_TTL:
+        return Response(cached[1], mimetype='text/html')
+
+    parts = [URL_MAIN_B]
+    
+    for provider, geo_code_list in geo_codes:
         body_text = providers[provider].body_text(provider, host, geo_code_list)
-        body += body_text
-        body += "</div>"
-        
-    return f"{url_main}{body}</section></body></html>"
+        parts.append(f"<div>{body_text}</div>".encode('utf-8'))
+
+    parts.append(URL_TAIL_B)
+    html = b''.join(parts)
+
+    # Drop expired pages so arbitrary Host headers cannot grow the cache
+    for stale_key in [k for k, (ts, _) in _index_cache.items() if now - ts >= INDEX_CACHE_TTL]:
+        del _index_cache[stale_key]
+    _index_cache[key] = (now, html)
+    return Response(html, mimetype='text/html')
 
 @app.route("/<provider>/token")
 def token(provider):
@@ -556,13 +989,14 @@ def channels_json(provider):
     if err: 
         return err
         
-    return stations
+    return Response(orjson.dumps(stations), mimetype='application/json')
 
 @app.get("/<provider>/rebuild_epg")
 def rebuild_epg(provider):
     """Trigger a complete rebuild of the EPG data."""
     providers[provider].rebuild_epg()
     trigger_epg_build(provider)
+    _index_cache.clear()
     return "Rebuilding EPG"
 
 @app.get("/<provider>/build_epg")
@@ -594,10 +1028,10 @@ def epg_xml(provider, filename):
         
         # Determine appropriate response based on file type
         if suffix.lower() == 'xml':
-            return send_file(file_path, as_attachment=False, 
-                            download_name=filename, mimetype='text/plain')
+            return send_epg_file(file_path, as_attachment=False, 
+                                 download_name=filename, mimetype='text/plain')
         elif suffix.lower() == 'gz':
-            return send_file(file_path, as_attachment=True, 
+            return send_file(file_path, as_attachment=True, conditional=True,
                             download_name=filename)
         else:
             return f"{file_path} file not found", 404
@@ -608,20 +1042,45 @@ def epg_xml(provider, filename):
 
 # === Server Startup ===
 
+class StreamingWSGIHandler(WSGIHandler):
+    """
+    WSGI handler that tunes each accepted socket for streaming playlist and segment responses.
+    """
+
+    def __init__(self, sock, address, server, rfile=None):
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_SNDBUF_SIZE)
+        except OSError as e:
+            logger.debug("[DEBUG] Unable to tune socket options: %s", e)
+        super().__init__(sock, address, server, rfile)
+
 if __name__ == '__main__':
     # Initialize main trigger event
     trigger_event = Event()
 
     # Create logos directory if it doesn't exist
     os.makedirs(logo_dir, exist_ok=True)
+    warm_logo_cache()
+
+    # Start background trimming of the segment cache
+    Thread(target=segment_cache_evictor, daemon=True).start()
 
-    # Start monitoring threads for all providers
+    # Start self-restarting schedulers for all providers
     for provider in PROVIDER_LIST:
-        Thread(target=monitor_thread, args=(provider,), daemon=True).start()
+        monitor_scheduler(provider)
 
     # Start the WSGI server
     try:
-        print(f"[INFO - MAIN] ⇨ http server started on [::]:{PORT}")
-        WSGIServer(('', PORT), app, log=None).serve_forever()
+        logger.info(f"[INFO - MAIN] ⇨ http server started on [::]:{PORT}")
+        WSGIServer(
+            ('', PORT),
+            app,
+            log=None,
+            spawn=Pool(MAX_CONNECTIONS),  # Bound concurrent connections instead of spawning without limit
+            handler_class=StreamingWSGIHandler
+        ).serve_forever()
     except OSError as e:
-        print(f"[ERROR - MAIN] Server failed to start: {e}")
+        logger.error(f"[ERROR - MAIN] Server failed to start: {e}")
+    finally:
+        flush_log_queue()  # Write any queued log records before exiting